@@ -1,47 +1,136 @@
 # src/main.py
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime, timedelta
-import jwt
+from datetime import datetime
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from collections import OrderedDict, defaultdict, deque
+from itertools import count, islice
+import hmac
+import os
+import time
 import hashlib
-from passlib.context import CryptContext
-import uvicorn
-
-# Initialize FastAPI app
-app = FastAPI(
-    title="Blog Management System",
-    description="A blog management system with CRUD operations, likes, and comments",
-    version="1.0.0"
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+import secrets
+import threading
+import anyio.to_thread
+import bcrypt
 
 # Security
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost are upgraded on the user's next login
+BCRYPT_ROUNDS = 10
+
+# Worker threads available for offloading bcrypt (anyio defaults to 40)
+BCRYPT_THREAD_LIMIT = 64
 
-# JWT Configuration
+# Auth Configuration
 SECRET_KEY = "your-secret-key-change-in-production"
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Older sessions are revoked once a user has this many
+MAX_SESSIONS_PER_USER = 10
+# Minimum gap between sweeps of expired sessions
+SESSION_SWEEP_INTERVAL_SECONDS = 60
+
+# Failed logins allowed per user within the window before bcrypt is skipped
+LOGIN_FAILURE_LIMIT = 5
+LOGIN_FAILURE_WINDOW_SECONDS = 60
+
+# Pagination
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Number of shards per store (must be a power of two)
+NSHARDS = 16
+
+# Dict split into NSHARDS shards, each guarded by its own lock, so threads working
+# on different keys don't contend on one dict when running without the GIL.
+# Single operations lock their shard; use lock(key) around read-modify-write sequences.
+class ShardedDict:
+    def __init__(self):
+        self.shards = [{} for _ in range(NSHARDS)]
+        self.locks = [threading.RLock() for _ in range(NSHARDS)]
+    
+    def _index(self, key) -> int:
+        return hash(key) & (NSHARDS - 1)
+    
+    def lock(self, key):
+        return self.locks[self._index(key)]
+    
+    def __getitem__(self, key):
+        return self.shards[self._index(key)][key]
+    
+    def __setitem__(self, key, value):
+        index = self._index(key)
+        with self.locks[index]:
+            self.shards[index][key] = value
+    
+    def __delitem__(self, key):
+        index = self._index(key)
+        with self.locks[index]:
+            del self.shards[index][key]
+    
+    def __contains__(self, key) -> bool:
+        return key in self.shards[self._index(key)]
+    
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+    
+    def get(self, key, default=None):
+        return self.shards[self._index(key)].get(key, default)
+    
+    def pop(self, key, *default):
+        index = self._index(key)
+        with self.locks[index]:
+            return self.shards[index].pop(key, *default)
+    
+    def add(self, key, delta: int) -> int:
+        index = self._index(key)
+        with self.locks[index]:
+            value = self.shards[index][key] + delta
+            self.shards[index][key] = value
+            return value
+    
+    def remove_if(self, predicate):
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                for key in [key for key, value in shard.items() if predicate(value)]:
+                    del shard[key]
 
 # In-memory storage (replace with database in production)
-users_db = {}
-posts_db = {}
-likes_db = {}
-comments_db = {}
-post_counter = 0
-comment_counter = 0
+# Note: this state is per process. With WORKERS > 1 each worker has its own copy,
+# so users, posts, likes and comments are not shared between them.
+# Changes touching a post's entries across several stores hold posts_db.lock(post_id).
+users_db = ShardedDict()
+sessions_db = ShardedDict()  # SHA-256 of access token -> (username, expiry timestamp)
+user_sessions = ShardedDict()  # username -> session digests, oldest first
+last_session_sweep = 0.0
+posts_db = ShardedDict()
+likes_db = ShardedDict()  # post_id -> bitset of liker uids
+comments_db = ShardedDict()  # post_id -> comment ids in insertion order
+comments_by_id = ShardedDict()
+likes_count_db = ShardedDict()
+comments_count_db = ShardedDict()
+# Shards have no overall order, so post ids are also kept newest-last here
+post_order = {}
+post_order_lock = threading.Lock()
+# next() on itertools.count is atomic, so ids can't be handed out twice
+user_uids = count()
+post_ids = count(1)
+comment_ids = count(1)
+
+# Likes bitsets grow in chunks of this many bytes (8 users per byte)
+LIKES_CHUNK_BYTES = 64
+
+# Successful bcrypt verifications: (username, HMAC of password) -> hashed password
+VERIFY_CACHE_SIZE = 10_000
+verified_passwords = OrderedDict()
+
+# Recent failed login timestamps per username
+recent_fails = defaultdict(lambda: deque(maxlen=20))
 
 # Pydantic Models
 class User(BaseModel):
@@ -94,42 +183,119 @@ class LikeResponse(BaseModel):
     message: str
     likes_count: int
 
+# Stored records
+# Slotted dataclasses are smaller than dicts and have faster attribute access
+@dataclass(slots=True)
+class PostRow:
+    id: int
+    title: str
+    content: str
+    author: str
+    created_at: datetime
+    updated_at: datetime
+
 # Utility functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-def decode_access_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials"
-            )
-        return username
-    except jwt.PyJWTError:
+# bcrypt is CPU-bound, so run it in a worker thread to keep the event loop free
+def bcrypt_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+
+def bcrypt_verify(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+async def hash_password(password: str) -> str:
+    return await anyio.to_thread.run_sync(bcrypt_hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await anyio.to_thread.run_sync(
+        bcrypt_verify, plain_password, hashed_password
+    )
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    # bcrypt hashes look like $2b$<rounds>$<salt+digest>
+    return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+
+def password_cache_key(username: str, password: str):
+    digest = hmac.new(SECRET_KEY.encode(), password.encode(), "sha256").digest()
+    return (username, digest)
+
+async def verify_password_cached(username: str, plain_password: str, hashed_password: str) -> bool:
+    key = password_cache_key(username, plain_password)
+    # Only trust a hit if the stored hash hasn't changed since it was cached
+    if verified_passwords.get(key) == hashed_password:
+        verified_passwords.move_to_end(key)
+        return True
+    
+    if not await verify_password(plain_password, hashed_password):
+        return False
+    
+    remember_verified_password(username, plain_password, hashed_password)
+    return True
+
+def remember_verified_password(username: str, plain_password: str, hashed_password: str):
+    verified_passwords[password_cache_key(username, plain_password)] = hashed_password
+    if len(verified_passwords) > VERIFY_CACHE_SIZE:
+        verified_passwords.popitem(last=False)
+
+def has_liked(likes: bytearray, uid: int) -> bool:
+    index = uid >> 3
+    return index < len(likes) and bool(likes[index] & (1 << (uid & 7)))
+
+def set_liked(likes: bytearray, uid: int):
+    index = uid >> 3
+    if index >= len(likes):
+        likes.extend(bytes(index - len(likes) + LIKES_CHUNK_BYTES))
+    likes[index] |= 1 << (uid & 7)
+
+def clear_liked(likes: bytearray, uid: int):
+    likes[uid >> 3] &= ~(1 << (uid & 7)) & 0xFF
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def sweep_expired_sessions(now: float):
+    # Expired sessions are otherwise only dropped when their token is presented again
+    global last_session_sweep
+    if now - last_session_sweep < SESSION_SWEEP_INTERVAL_SECONDS:
+        return
+    last_session_sweep = now
+    sessions_db.remove_if(lambda session: session[1] <= now)
+
+def create_access_token(username: str, now: Optional[float] = None) -> str:
+    # Tokens are random, so a single SHA-256 is enough to store them safely
+    token = secrets.token_urlsafe(32)
+    if now is None:
+        now = time.time()
+    sweep_expired_sessions(now)
+    
+    digest = token_digest(token)
+    expire = now + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    with user_sessions.lock(username):
+        digests = user_sessions.get(username)
+        if digests is None:
+            digests = user_sessions[username] = deque()
+        # Forget sessions that already expired, then revoke the oldest past the cap
+        while digests and digests[0] not in sessions_db:
+            digests.popleft()
+        while len(digests) >= MAX_SESSIONS_PER_USER:
+            sessions_db.pop(digests.popleft(), None)
+        digests.append(digest)
+        sessions_db[digest] = (username, expire)
+    return token
+
+def lookup_session(token: str) -> str:
+    digest = token_digest(token)
+    session = sessions_db.get(digest)
+    if session is None or session[1] <= time.time():
+        sessions_db.pop(digest, None)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
+    return session[0]
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    username = decode_access_token(token)
+    username = lookup_session(token)
     
     if username not in users_db:
         raise HTTPException(
@@ -139,6 +305,30 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     
     return username
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = BCRYPT_THREAD_LIMIT
+    yield
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="Blog Management System",
+    description="A blog management system with CRUD operations, likes, and comments",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
+)
+
 # Authentication endpoints
 @app.post("/api/auth/register", response_model=UserResponse)
 async def register(user: User):
@@ -148,12 +338,20 @@ async def register(user: User):
             detail="Username already registered"
         )
     
-    hashed_password = hash_password(user.password)
-    users_db[user.username] = {
-        "username": user.username,
-        "email": user.email,
-        "hashed_password": hashed_password
-    }
+    hashed_password = await hash_password(user.password)
+    with users_db.lock(user.username):
+        # Another request may have registered the name while we were hashing
+        if user.username in users_db:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already registered"
+            )
+        users_db[user.username] = {
+            "username": user.username,
+            "email": user.email,
+            "hashed_password": hashed_password,
+            "uid": next(user_uids)
+        }
     
     return UserResponse(username=user.username, email=user.email)
 
@@ -165,62 +363,126 @@ async def login(user_login: UserLogin):
             detail="Incorrect username or password"
         )
     
+    now = time.time()
+    
+    # Cap bcrypt work per user so password spraying can't pin the CPU
+    failures = recent_fails[user_login.username]
+    window_start = now - LOGIN_FAILURE_WINDOW_SECONDS
+    while failures and failures[0] < window_start:
+        failures.popleft()
+    if len(failures) >= LOGIN_FAILURE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later"
+        )
+    
+    # Count the attempt before awaiting bcrypt so a concurrent burst can't all pass
+    # the check above; it only stays recorded if the password turns out wrong
+    failures.append(now)
+    
     user_data = users_db[user_login.username]
-    if not verify_password(user_login.password, user_data["hashed_password"]):
+    if not await verify_password_cached(
+        user_login.username, user_login.password, user_data["hashed_password"]
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user_login.username}, expires_delta=access_token_expires
-    )
+    recent_fails.pop(user_login.username, None)
+    
+    if password_needs_rehash(user_data["hashed_password"]):
+        user_data["hashed_password"] = await hash_password(user_login.password)
+        remember_verified_password(
+            user_login.username, user_login.password, user_data["hashed_password"]
+        )
+    
+    access_token = create_access_token(user_login.username, now)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
-# Blog Post CRUD endpoints
-@app.post("/api/posts", response_model=BlogPostResponse)
-async def create_post(post: BlogPost, current_user: str = Depends(get_current_user)):
-    global post_counter
-    post_counter += 1
-    
-    now = datetime.utcnow()
-    post_data = {
-        "id": post_counter,
+@app.post("/api/auth/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: str = Depends(get_current_user)
+):
+    digest = token_digest(credentials.credentials)
+    with user_sessions.lock(current_user):
+        sessions_db.pop(digest, None)
+        digests = user_sessions.get(current_user)
+        if digests is not None and digest in digests:
+            digests.remove(digest)
+    
+    return {"message": "Logged out successfully"}
+
+def post_response(post_id: int) -> dict:
+    post = posts_db[post_id]
+    return {
+        "id": post.id,
         "title": post.title,
         "content": post.content,
-        "author": current_user,
-        "created_at": now,
-        "updated_at": now
+        "author": post.author,
+        "created_at": post.created_at,
+        "updated_at": post.updated_at,
+        "likes_count": likes_count_db[post_id],
+        "comments_count": comments_count_db[post_id]
     }
-    
-    posts_db[post_counter] = post_data
-    likes_db[post_counter] = set()
-    comments_db[post_counter] = []
-    
-    return BlogPostResponse(
-        **post_data,
-        likes_count=0,
-        comments_count=0
-    )
 
-@app.get("/api/posts", response_model=List[BlogPostResponse])
-async def get_all_posts():
-    result = []
-    for post_id, post_data in posts_db.items():
-        likes_count = len(likes_db.get(post_id, set()))
-        comments_count = len(comments_db.get(post_id, []))
-        
-        result.append(BlogPostResponse(
-            **post_data,
-            likes_count=likes_count,
-            comments_count=comments_count
-        ))
+# Blog Post CRUD endpoints
+# Every response field is either server-generated or was validated on the way in,
+# so these routes hand plain dicts straight to ORJSONResponse and skip FastAPI's
+# response validation and jsonable_encoder pass. The models are listed under
+# responses= to keep the OpenAPI schema.
+@app.post(
+    "/api/posts",
+    response_model=None,
+    responses={200: {"model": BlogPostResponse}}
+)
+async def create_post(post: BlogPost, current_user: str = Depends(get_current_user)):
+    post_id = next(post_ids)
     
-    return sorted(result, key=lambda x: x.created_at, reverse=True)
+    now = datetime.utcnow()
+    posts_db[post_id] = PostRow(
+        id=post_id,
+        title=post.title,
+        content=post.content,
+        author=current_user,
+        created_at=now,
+        updated_at=now
+    )
+    likes_db[post_id] = bytearray()
+    comments_db[post_id] = []
+    likes_count_db[post_id] = 0
+    comments_count_db[post_id] = 0
+    with post_order_lock:
+        post_order[post_id] = None
+    
+    return ORJSONResponse(post_response(post_id))
+
+@app.get(
+    "/api/posts",
+    response_model=None,
+    responses={200: {"model": List[BlogPostResponse]}}
+)
+async def get_all_posts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    # Post ids increase with creation time, so reverse insertion order is newest first
+    with post_order_lock:
+        total = len(post_order)
+        page = list(islice(reversed(post_order), offset, offset + limit))
+    
+    return ORJSONResponse(
+        [post_response(post_id) for post_id in page],
+        headers={"X-Total-Count": str(total)}
+    )
 
-@app.get("/api/posts/{post_id}", response_model=BlogPostResponse)
+@app.get(
+    "/api/posts/{post_id}",
+    response_model=None,
+    responses={200: {"model": BlogPostResponse}}
+)
 async def get_post(post_id: int):
     if post_id not in posts_db:
         raise HTTPException(
@@ -228,170 +490,203 @@ async def get_post(post_id: int):
             detail="Post not found"
         )
     
-    post_data = posts_db[post_id]
-    likes_count = len(likes_db.get(post_id, set()))
-    comments_count = len(comments_db.get(post_id, []))
-    
-    return BlogPostResponse(
-        **post_data,
-        likes_count=likes_count,
-        comments_count=comments_count
-    )
+    return ORJSONResponse(post_response(post_id))
 
-@app.put("/api/posts/{post_id}", response_model=BlogPostResponse)
+@app.put(
+    "/api/posts/{post_id}",
+    response_model=None,
+    responses={200: {"model": BlogPostResponse}}
+)
 async def update_post(
     post_id: int, 
     post_update: BlogPostUpdate, 
     current_user: str = Depends(get_current_user)
 ):
-    if post_id not in posts_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
-    
-    post_data = posts_db[post_id]
-    if post_data["author"] != current_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this post"
-        )
-    
-    # Update only provided fields
-    if post_update.title is not None:
-        post_data["title"] = post_update.title
-    if post_update.content is not None:
-        post_data["content"] = post_update.content
-    
-    post_data["updated_at"] = datetime.utcnow()
-    
-    likes_count = len(likes_db.get(post_id, set()))
-    comments_count = len(comments_db.get(post_id, []))
-    
-    return BlogPostResponse(
-        **post_data,
-        likes_count=likes_count,
-        comments_count=comments_count
-    )
+    with posts_db.lock(post_id):
+        if post_id not in posts_db:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        
+        post = posts_db[post_id]
+        if post.author != current_user:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to update this post"
+            )
+        
+        # Update only provided fields
+        if post_update.title is not None:
+            post.title = post_update.title
+        if post_update.content is not None:
+            post.content = post_update.content
+        
+        post.updated_at = datetime.utcnow()
+        
+        return ORJSONResponse(post_response(post_id))
 
 @app.delete("/api/posts/{post_id}")
 async def delete_post(post_id: int, current_user: str = Depends(get_current_user)):
-    if post_id not in posts_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
-    
-    post_data = posts_db[post_id]
-    if post_data["author"] != current_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this post"
-        )
-    
-    # Clean up related data
-    del posts_db[post_id]
-    if post_id in likes_db:
+    with posts_db.lock(post_id):
+        if post_id not in posts_db:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        
+        post = posts_db[post_id]
+        if post.author != current_user:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to delete this post"
+            )
+        
+        # Clean up related data
+        with post_order_lock:
+            del post_order[post_id]
+        del posts_db[post_id]
         del likes_db[post_id]
-    if post_id in comments_db:
-        del comments_db[post_id]
+        for comment_id in comments_db.pop(post_id):
+            del comments_by_id[comment_id]
+        del likes_count_db[post_id]
+        del comments_count_db[post_id]
     
     return {"message": "Post deleted successfully"}
 
 # Like functionality
-@app.post("/api/posts/{post_id}/like", response_model=LikeResponse)
+@app.post(
+    "/api/posts/{post_id}/like",
+    response_model=None,
+    responses={200: {"model": LikeResponse}}
+)
 async def like_post(post_id: int, current_user: str = Depends(get_current_user)):
-    if post_id not in posts_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
-    
-    if post_id not in likes_db:
-        likes_db[post_id] = set()
-    
-    if current_user in likes_db[post_id]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already liked this post"
-        )
-    
-    likes_db[post_id].add(current_user)
-    likes_count = len(likes_db[post_id])
-    
-    return LikeResponse(
-        message="Post liked successfully",
-        likes_count=likes_count
-    )
-
-@app.delete("/api/posts/{post_id}/like")
+    uid = users_db[current_user]["uid"]
+    with posts_db.lock(post_id):
+        if post_id not in posts_db:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        
+        if has_liked(likes_db[post_id], uid):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already liked this post"
+            )
+        
+        set_liked(likes_db[post_id], uid)
+        likes_count = likes_count_db.add(post_id, 1)
+    
+    return ORJSONResponse({
+        "message": "Post liked successfully",
+        "likes_count": likes_count
+    })
+
+@app.delete(
+    "/api/posts/{post_id}/like",
+    response_model=None,
+    responses={200: {"model": LikeResponse}}
+)
 async def unlike_post(post_id: int, current_user: str = Depends(get_current_user)):
-    if post_id not in posts_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
-    
-    if post_id not in likes_db or current_user not in likes_db[post_id]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You haven't liked this post"
-        )
-    
-    likes_db[post_id].remove(current_user)
-    likes_count = len(likes_db[post_id])
+    uid = users_db[current_user]["uid"]
+    with posts_db.lock(post_id):
+        if post_id not in posts_db:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        
+        if not has_liked(likes_db[post_id], uid):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You haven't liked this post"
+            )
+        
+        clear_liked(likes_db[post_id], uid)
+        likes_count = likes_count_db.add(post_id, -1)
     
-    return LikeResponse(
-        message="Post unliked successfully",
-        likes_count=likes_count
-    )
+    return ORJSONResponse({
+        "message": "Post unliked successfully",
+        "likes_count": likes_count
+    })
 
 # Comment functionality
-@app.post("/api/posts/{post_id}/comment", response_model=CommentResponse)
+@app.post(
+    "/api/posts/{post_id}/comment",
+    response_model=None,
+    responses={200: {"model": CommentResponse}}
+)
 async def add_comment(
     post_id: int, 
     comment: Comment, 
     current_user: str = Depends(get_current_user)
 ):
-    if post_id not in posts_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
-    
-    global comment_counter
-    comment_counter += 1
-    
-    comment_data = {
-        "id": comment_counter,
-        "content": comment.content,
-        "author": current_user,
-        "post_id": post_id,
-        "created_at": datetime.utcnow()
-    }
-    
-    if post_id not in comments_db:
-        comments_db[post_id] = []
-    
-    comments_db[post_id].append(comment_data)
+    with posts_db.lock(post_id):
+        if post_id not in posts_db:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        
+        comment_id = next(comment_ids)
+        
+        comment_data = {
+            "id": comment_id,
+            "content": comment.content,
+            "author": current_user,
+            "post_id": post_id,
+            "created_at": datetime.utcnow()
+        }
+        
+        comments_by_id[comment_id] = comment_data
+        comments_db[post_id].append(comment_id)
+        comments_count_db.add(post_id, 1)
     
-    return CommentResponse(**comment_data)
+    return ORJSONResponse(comment_data)
 
-@app.get("/api/posts/{post_id}/comments", response_model=List[CommentResponse])
-async def get_comments(post_id: int):
+@app.get(
+    "/api/posts/{post_id}/comments",
+    response_model=None,
+    responses={200: {"model": List[CommentResponse]}}
+)
+async def get_comments(
+    post_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
     if post_id not in posts_db:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    comments = comments_db.get(post_id, [])
-    return [CommentResponse(**comment) for comment in comments]
+    comment_ids_for_post = comments_db[post_id]
+    return ORJSONResponse(
+        [
+            comments_by_id[comment_id]
+            for comment_id in comment_ids_for_post[offset:offset + limit]
+        ],
+        headers={"X-Total-Count": str(len(comment_ids_for_post))}
+    )
 
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    # Returned directly so orjson encodes the datetime instead of jsonable_encoder
+    return ORJSONResponse({"status": "healthy", "timestamp": datetime.utcnow()})
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Imported here so worker processes that only load the app don't pay for it
+    import uvicorn
+    
+    # loop/http "auto" pick uvloop and httptools when installed (uvicorn[standard])
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WORKERS", "1")),
+        loop="auto",
+        http="auto",
+        reload=os.getenv("DEV") == "1"
+    )